@@ -5,18 +5,55 @@ import re
 import socket
 import sys
 import json
+import argparse
+import base64
+import bisect
+import hashlib
+import statistics
+import struct
+import threading
+import urllib.parse
 import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import (
+        NoSuchElementException,
+        WebDriverException,
+        JavascriptException,
+        TimeoutException,
+    )
+    from webdriver_manager.chrome import ChromeDriverManager
+except ModuleNotFoundError:
+    # Selenium is only needed for the fallback backend.
+    webdriver = None
+
+    class By:
+        XPATH = "xpath"
+        CSS_SELECTOR = "css selector"
+
+    class WebDriverException(Exception):
+        pass
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException, WebDriverException, JavascriptException
-from webdriver_manager.chrome import ChromeDriverManager
+    class NoSuchElementException(WebDriverException):
+        pass
+
+    class JavascriptException(WebDriverException):
+        pass
+
+    class TimeoutException(WebDriverException):
+        pass
 
 
 DEBUG_PORT = 9222
+BROWSER_BACKENDS = ("auto", "devtools", "selenium")
 if os.name == "nt":
     CHROME_PROFILE_PATH = r"C:\ChromeSeleniumProfile"
 else:
@@ -32,6 +69,14 @@ OGS_LOGIN_URL = "https://online-go.com/sign-in#/play"
 TSUMEGO_MIN = 15
 PLAY_MIN = 45
 REVIEW_MIN = 10
+# Shortest review a queued game gets; games that do not fit in REVIEW_MIN are skipped.
+REVIEW_FLOOR_SECONDS = 60
+
+# Polling backs off once the user has been idle this long or the tab is hidden.
+IDLE_AFTER_SECONDS = 120
+IDLE_POLL_SECONDS = 15
+HIDDEN_POLL_SECONDS = 30
+SCRIPT_TIMEOUT_SECONDS = 90
 
 OVERLAY_COPY = {
     "tsumego_complete_title": "Study complete!",
@@ -48,6 +93,8 @@ OVERLAY_COPY = {
     "play_complete_title": "Play block complete!",
     "play_complete_subtitle": "Click NEXT to review",
     "review_title": "Review",
+    "review_next_title": "Game reviewed!",
+    "review_next_subtitle": "Click NEXT for the next game",
     "review_complete_title": "Review complete!",
     "review_complete_subtitle": "Click NEXT to play again",
 }
@@ -58,6 +105,14 @@ PLAY_PHASE_OFFER_REVIEW = "offer_review"
 PLAY_PHASE_TIME_UP = "time_up"
 
 LAST_NAVIGATION = {"url": None, "time": 0.0}
+
+# Swapped out by the replay driver so recorded sessions run on a virtual clock.
+CLOCK = {"time": time.time, "sleep": time.sleep}
+
+TRACE_VERSION = 1
+# A replay that polls slower than the recording may step past the last
+# event; it keeps answering with the final state for this long.
+REPLAY_GRACE_SECONDS = 60
 
 
 # ================================
@@ -133,9 +188,12 @@ def launch_chrome(first_url):
     raise RuntimeError("Chrome failed to launch.")
 
 
-def get_driver():
+def get_selenium_driver():
 
-    launch_chrome(TSUMEGO_URL)
+    if webdriver is None:
+        raise RuntimeError(
+            "Selenium is not installed. Install selenium and webdriver-manager to use the Selenium backend."
+        )
 
     options = Options()
     options.debugger_address = f"127.0.0.1:{DEBUG_PORT}"
@@ -144,7 +202,572 @@ def get_driver():
         service=Service(ChromeDriverManager().install()),
         options=options
     )
+    driver.set_script_timeout(SCRIPT_TIMEOUT_SECONDS)
 
+    return driver
+
+
+def get_driver(backend="auto"):
+
+    launch_chrome(TSUMEGO_URL)
+
+    if backend != "selenium":
+        try:
+            driver = DevToolsDriver(DEBUG_PORT)
+            driver.set_script_timeout(SCRIPT_TIMEOUT_SECONDS)
+            return driver
+        except WebDriverException as exc:
+            if backend == "devtools":
+                raise
+            print(f"DevTools backend unavailable, falling back to Selenium: {exc}", file=sys.stderr)
+
+    return get_selenium_driver()
+
+
+# ================================
+# DevTools Backend
+# ================================
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Raised by Runtime.evaluate while the page is between documents.
+CONTEXT_LOST_ERRORS = (
+    "Cannot find default execution context",
+    "Cannot find context with specified id",
+    "Execution context was destroyed",
+)
+
+
+def mask_payload(mask, payload):
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    masked = int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+    return masked.to_bytes(len(payload), "big")
+
+
+class DevToolsConnection:
+    """Minimal WebSocket client for a single DevTools target, enough for request/response calls."""
+
+    def __init__(self, ws_url, timeout=10):
+        parsed = urllib.parse.urlsplit(ws_url)
+        self.timeout = timeout
+        self.buffer = b""
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.sock = socket.create_connection((parsed.hostname, parsed.port or 80), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        self.sock.sendall(
+            (
+                f"GET {parsed.path} HTTP/1.1\r\n"
+                f"Host: {parsed.netloc}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n\r\n"
+            ).encode("ascii")
+        )
+        response = self.read_until(b"\r\n\r\n").decode("latin-1")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        status = response.split(" ", 2)[1] if " " in response else ""
+        if status != "101" or accept not in response:
+            self.sock.close()
+            raise WebDriverException(f"DevTools handshake failed: {response.splitlines()[0]}")
+
+    def read_until(self, marker):
+        while marker not in self.buffer:
+            self.receive()
+        head, _, self.buffer = self.buffer.partition(marker)
+        return head
+
+    def read_exact(self, size):
+        while len(self.buffer) < size:
+            self.receive()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def receive(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("DevTools connection closed")
+        self.buffer += chunk
+
+    def send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        mask = os.urandom(4)
+        self.sock.sendall(header + mask + mask_payload(mask, payload))
+
+    def read_message(self):
+        fragments = []
+        while True:
+            first, second = self.read_exact(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self.read_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self.read_exact(8))[0]
+            mask = self.read_exact(4) if second & 0x80 else None
+            payload = self.read_exact(length)
+            if mask:
+                payload = mask_payload(mask, payload)
+
+            if opcode == 0x8:
+                raise ConnectionError("DevTools connection closed")
+            if opcode == 0x9:
+                self.send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            fragments.append(payload)
+            if first & 0x80:
+                return b"".join(fragments).decode("utf-8")
+
+    def call(self, method, timeout=None, **params):
+        with self.lock:
+            self.next_id += 1
+            message_id = self.next_id
+            request = {"id": message_id, "method": method, "params": params}
+            self.send_frame(0x1, json.dumps(request).encode("utf-8"))
+            self.sock.settimeout(timeout or self.timeout)
+            # Events are never enabled, but skip any that arrive anyway.
+            while True:
+                message = json.loads(self.read_message())
+                if message.get("id") == message_id:
+                    break
+
+        if "error" in message:
+            raise WebDriverException(f"{method} failed: {message['error'].get('message')}")
+        return message.get("result", {})
+
+    def close(self):
+        try:
+            self.send_frame(0x8, b"")
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class DevToolsDriver:
+    """Drives the kiosk tab over the DevTools Protocol on DEBUG_PORT, without chromedriver.
+
+    Implements the subset of the Selenium driver API the training loop uses.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.script_timeout = 30
+        self.connection = None
+        self.connect()
+
+    def connect(self):
+        # Surface an unreachable or restarting browser as a driver error, like call does.
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/json", timeout=5) as response:
+                targets = json.load(response)
+            pages = [target for target in targets if target.get("type") == "page" and target.get("webSocketDebuggerUrl")]
+            if not pages:
+                raise WebDriverException(f"No DevTools page target on port {self.port}")
+            self.connection = DevToolsConnection(pages[0]["webSocketDebuggerUrl"])
+        except (OSError, ValueError) as exc:
+            raise WebDriverException(f"DevTools connection on port {self.port} failed: {exc}") from exc
+
+    def call(self, method, timeout=None, **params):
+        if self.connection is None:
+            self.connect()
+        try:
+            return self.connection.call(method, timeout, **params)
+        except OSError as exc:
+            # A timed-out or dropped socket may hold half a frame; reconnect on the next call.
+            self.connection.close()
+            self.connection = None
+            raise WebDriverException(f"DevTools {method} failed: {exc}") from exc
+
+    def evaluate(self, expression, await_promise=False, timeout=None, retry_seconds=3):
+        # chromedriver waits out pending navigations; retry briefly to match.
+        # Async scripts are not retried, as rerunning them would restart their wait.
+        end = time.time() + retry_seconds
+        while True:
+            try:
+                return self.evaluate_once(expression, await_promise, timeout)
+            except WebDriverException as exc:
+                lost = any(error in str(exc) for error in CONTEXT_LOST_ERRORS)
+                if await_promise or not lost or time.time() >= end:
+                    raise
+            time.sleep(0.1)
+
+    def evaluate_once(self, expression, await_promise=False, timeout=None):
+        result = self.call(
+            "Runtime.evaluate",
+            timeout,
+            expression=expression,
+            returnByValue=True,
+            awaitPromise=await_promise,
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise JavascriptException(details.get("exception", {}).get("description") or details.get("text"))
+        return result.get("result", {}).get("value")
+
+    @property
+    def current_url(self):
+        # Navigation history needs no JS context, so this works mid-navigation.
+        history = self.call("Page.getNavigationHistory")
+        return history["entries"][history["currentIndex"]]["url"]
+
+    def get(self, url, timeout=30):
+        result = self.call("Page.navigate", url=url)
+        if result.get("errorText"):
+            raise WebDriverException(f"Navigation to {url} failed: {result['errorText']}")
+        end = time.time() + timeout
+        while time.time() < end:
+            try:
+                if self.evaluate("document.readyState") == "complete":
+                    return
+            except WebDriverException:
+                pass
+            time.sleep(0.1)
+        raise TimeoutException(f"{url} did not finish loading within {timeout}s")
+
+    def execute_script(self, script, *args):
+        return self.evaluate(f"(function() {{ {script}\n}}).apply(null, {json.dumps(list(args))})")
+
+    def execute_async_script(self, script, *args):
+        timeout_ms = int(self.script_timeout * 1000)
+        # Clear the timer once the script settles so finished waits leave no timers behind.
+        expression = f"""(() => {{
+            let timer;
+            return Promise.race([
+                new Promise((resolve) => (function() {{ {script}\n}}).apply(null, {json.dumps(list(args))}.concat([resolve]))),
+                new Promise((_, reject) => {{ timer = setTimeout(() => reject(new Error('script timeout')), {timeout_ms}); }}),
+            ]).finally(() => clearTimeout(timer));
+        }})()"""
+        try:
+            return self.evaluate(expression, await_promise=True, timeout=self.script_timeout + 5)
+        except JavascriptException as exc:
+            if "script timeout" in str(exc):
+                raise TimeoutException(f"Script did not finish within {self.script_timeout}s") from exc
+            raise
+
+    def find_element(self, by, value):
+        if by == By.XPATH:
+            expression = (
+                f"document.evaluate({json.dumps(value)}, document, null, "
+                "XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null"
+            )
+        elif by == By.CSS_SELECTOR:
+            expression = f"document.querySelector({json.dumps(value)}) !== null"
+        else:
+            raise WebDriverException(f"Unsupported locator strategy: {by}")
+        if not self.evaluate(expression):
+            raise NoSuchElementException(f"No element matches {value}")
+        # Callers only test for presence, so there is no element handle to return.
+        return True
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def quit(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def probe_script_timeout(driver):
+    driver.set_script_timeout(1)
+    try:
+        driver.execute_async_script("/* never calls back */")
+    except WebDriverException as exc:
+        return type(exc).__name__
+    finally:
+        driver.set_script_timeout(SCRIPT_TIMEOUT_SECONDS)
+    return None
+
+
+def probe_get(driver):
+    url = driver.current_url
+    driver.get(url)
+    return driver.current_url
+
+
+# (name, call, most calls to make); probes that navigate or wait are capped.
+BENCHMARK_PROBES = [
+    ("current_url", lambda driver: driver.current_url, None),
+    ("execute_script", lambda driver: driver.execute_script("return document.readyState"), None),
+    (
+        "execute_async",
+        lambda driver: driver.execute_async_script("arguments[arguments.length - 1](document.readyState);"),
+        None,
+    ),
+    ("find_element", lambda driver: element_exists(driver, By.XPATH, "//button[contains(., 'Analyze')]"), None),
+    ("get", probe_get, 5),
+    ("script_timeout", probe_script_timeout, 2),
+    ("poll_wait", lambda driver: poll_wait(driver, 0.5), 5),
+]
+
+
+def benchmark_backends(calls=200):
+    launch_chrome(TSUMEGO_URL)
+    drivers = {"devtools": DevToolsDriver(DEBUG_PORT), "selenium": get_selenium_driver()}
+    for driver in drivers.values():
+        driver.set_script_timeout(SCRIPT_TIMEOUT_SECONDS)
+
+    print(f"Up to {calls} calls per probe against the open tab")
+    print(f"  {'probe':<16}{'backend':<10}{'median ms':>11}{'p95 ms':>9}")
+    mismatches = []
+    try:
+        for probe, call, max_calls in BENCHMARK_PROBES:
+            values = {}
+            for name, driver in drivers.items():
+                timings = []
+                for _ in range(min(calls, max_calls or calls)):
+                    start = time.perf_counter()
+                    values[name] = call(driver)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                print(f"  {probe:<16}{name:<10}{statistics.median(timings):>11.2f}{p95:>9.2f}")
+            if values["devtools"] != values["selenium"]:
+                mismatches.append(f"{probe}: devtools={values['devtools']!r} selenium={values['selenium']!r}")
+    finally:
+        for driver in drivers.values():
+            driver.quit()
+
+    for mismatch in mismatches:
+        print(f"MISMATCH {mismatch}")
+    return not mismatches
+
+
+# ================================
+# Session Traces (record / replay)
+# ================================
+
+class ReplayExhausted(RuntimeError):
+    pass
+
+
+REPLAY_EXCEPTIONS = {
+    "NoSuchElementException": NoSuchElementException,
+    "JavascriptException": JavascriptException,
+    "TimeoutException": TimeoutException,
+    "WebDriverException": WebDriverException,
+}
+
+# Calls that only cause side effects (overlay redraws, navigation) may differ
+# between versions; any other call missing from the trace fails the replay.
+REPLAY_OPTIONAL_OPS = {"execute_script", "execute_async_script", "get"}
+
+
+def script_key(script, args=()):
+    digest = hashlib.sha1(script.encode("utf-8"))
+    if args:
+        digest.update(json.dumps(args, default=repr).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+class RecordingDriver:
+    """Wraps a live driver and appends every browser call, with its result and timing, to a trace file."""
+
+    def __init__(self, driver, trace_path):
+        self.driver = driver
+        self.started = clock_time()
+        self._lock = threading.Lock()
+        self._trace = open(trace_path, "w", encoding="utf-8")
+        self._write({"version": TRACE_VERSION, "started": time.time()})
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def _write(self, event):
+        line = json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=repr)
+        with self._lock:
+            # Background game downloads can finish after the session has ended.
+            if self._trace.closed:
+                return
+            self._trace.write(line + "\n")
+            self._trace.flush()
+
+    def _record(self, op, key, call, summarize=None):
+        event = {"t": round(clock_time() - self.started, 3), "op": op, "key": key}
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception as exc:
+            event["error"] = type(exc).__name__
+            raise
+        else:
+            event["result"] = summarize(result) if summarize else result
+            return result
+        finally:
+            event["ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self._write(event)
+
+    @property
+    def current_url(self):
+        return self._record("current_url", "", lambda: self.driver.current_url)
+
+    def get(self, url):
+        return self._record("get", url, lambda: self.driver.get(url))
+
+    def find_element(self, by, value):
+        return self._record(
+            "find_element",
+            f"{by}={value}",
+            lambda: self.driver.find_element(by, value),
+            lambda element: True,
+        )
+
+    def execute_script(self, script, *args):
+        return self._record(
+            "execute_script",
+            script_key(script, args),
+            lambda: self.driver.execute_script(script, *args),
+        )
+
+    def execute_async_script(self, script, *args):
+        return self._record(
+            "execute_async_script",
+            script_key(script, args),
+            lambda: self.driver.execute_async_script(script, *args),
+        )
+
+    def load_game_data(self, game_id):
+        return self._record("game_data", str(game_id), lambda: load_game_data(self.driver, game_id))
+
+    def load_game_sgf(self, game_id):
+        return self._record("game_sgf", str(game_id), lambda: load_game_sgf(self.driver, game_id))
+
+    def close_trace(self):
+        with self._lock:
+            self._trace.close()
+
+
+class ReplayDriver:
+    """Answers browser calls from a recorded trace on a virtual clock, with no browser or network.
+
+    Each call returns what the same call returned at the matching point of the
+    recording, so versions that poll more or less often still see the same page.
+    """
+
+    def __init__(self, trace_path):
+        self.events = {}
+        self.recorded_calls = Counter()
+        self.calls = Counter()
+        self.unmatched = Counter()
+        self.cursors = {}
+        self.now = 0.0
+        self.end = 0.0
+        self._lock = threading.Lock()
+
+        with open(trace_path, encoding="utf-8") as trace:
+            header = json.loads(trace.readline() or "{}")
+            if header.get("version") != TRACE_VERSION:
+                raise ValueError(f"Unsupported trace file: {trace_path}")
+            for line in trace:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                self.events.setdefault((event["op"], event["key"]), []).append(event)
+                self.recorded_calls[event["op"]] += 1
+                self.end = max(self.end, event["t"])
+
+        for events in self.events.values():
+            events.sort(key=lambda event: event["t"])
+        self.times = {key: [event["t"] for event in events] for key, events in self.events.items()}
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if self.now > self.end + REPLAY_GRACE_SECONDS:
+            raise ReplayExhausted(f"Trace ended at {self.end:.1f}s")
+
+    def _replay(self, op, key, advance=True):
+        with self._lock:
+            return self._next_result(op, key, advance)
+
+    def _next_result(self, op, key, advance):
+        self.calls[op] += 1
+        events = self.events.get((op, key))
+        if not events:
+            self.unmatched[op] += 1
+            if op == "find_element":
+                raise NoSuchElementException(f"No recorded find_element call for {key!r}")
+            return None
+
+        # Prefer the next unconsumed event among those recorded at the latest
+        # instant not after now, so identical call sequences replay in order.
+        times = self.times[(op, key)]
+        latest = max(0, bisect.bisect_right(times, self.now) - 1)
+        first_at_latest = bisect.bisect_left(times, times[latest])
+        index = min(latest, max(self.cursors.get((op, key), 0), first_at_latest))
+        self.cursors[(op, key)] = index + 1
+        event = events[index]
+        if advance:
+            self.now += event.get("ms", 0) / 1000
+        if "error" in event:
+            raise REPLAY_EXCEPTIONS.get(event["error"], WebDriverException)(f"Replayed {event['error']}")
+        return event.get("result")
+
+    @property
+    def current_url(self):
+        return self._replay("current_url", "")
+
+    def get(self, url):
+        return self._replay("get", url)
+
+    def find_element(self, by, value):
+        return self._replay("find_element", f"{by}={value}")
+
+    def execute_script(self, script, *args):
+        return self._replay("execute_script", script_key(script, args))
+
+    def execute_async_script(self, script, *args):
+        return self._replay("execute_async_script", script_key(script, args))
+
+    # Game downloads run on background threads, so they do not advance the clock.
+    def load_game_data(self, game_id):
+        return self._replay("game_data", str(game_id), advance=False)
+
+    def load_game_sgf(self, game_id):
+        return self._replay("game_sgf", str(game_id), advance=False)
+
+
+def print_replay_report(driver, cpu_seconds):
+    print(f"Replayed {driver.now:.1f}s of {driver.end:.1f}s recorded, CPU {cpu_seconds:.3f}s")
+    print(f"  {'call':<22}{'recorded':>10}{'replayed':>10}{'unmatched':>11}")
+    for op in sorted(set(driver.recorded_calls) | set(driver.calls)):
+        print(
+            f"  {op:<22}{driver.recorded_calls[op]:>10}{driver.calls[op]:>10}{driver.unmatched[op]:>11}"
+        )
+
+
+def replay_matched(driver):
+    return not any(count for op, count in driver.unmatched.items() if op not in REPLAY_OPTIONAL_OPS)
+
+
+def replay_session(trace_path):
+    driver = ReplayDriver(trace_path)
+    saved_clock = dict(CLOCK)
+    CLOCK.update(time=driver.time, sleep=driver.sleep)
+    LAST_NAVIGATION.update(url=None, time=0.0)
+
+    cpu_start = time.process_time()
+    try:
+        run(driver)
+    except ReplayExhausted:
+        pass
+    finally:
+        CLOCK.update(saved_clock)
+
+    print_replay_report(driver, time.process_time() - cpu_start)
     return driver
 
 
@@ -260,23 +883,31 @@ def inject_overlay(
 # Helpers
 # ================================
 
+def clock_time():
+    return CLOCK["time"]()
+
+
+def clock_sleep(seconds):
+    CLOCK["sleep"](seconds)
+
+
 def wait_for_dom_ready(driver, timeout=8):
-    end = time.time() + timeout
-    while time.time() < end:
+    end = clock_time() + timeout
+    while clock_time() < end:
         try:
             ready_state = driver.execute_script("return document.readyState")
             has_body = driver.execute_script("return !!document.body")
         except (WebDriverException, JavascriptException):
-            time.sleep(0.2)
+            clock_sleep(0.2)
             continue
         if ready_state in {"interactive", "complete"} and has_body:
             return True
-        time.sleep(0.2)
+        clock_sleep(0.2)
     return False
 
 
 def safe_get(driver, url, min_interval=2.0):
-    now = time.time()
+    now = clock_time()
     if driver.current_url.startswith(url):
         return False
     last_url = LAST_NAVIGATION["url"]
@@ -307,7 +938,7 @@ def element_exists(driver, by, value):
 
 
 def get_game_id(url):
-    match = re.search(r'(?:game|review)/(\\d+)', url)
+    match = re.search(r'(?:game|review)/(\d+)', url)
     return match.group(1) if match else None
 
 
@@ -329,6 +960,33 @@ def fetch_game_data(game_id):
         return None
 
 
+def game_sgf_url(game_id):
+    return f"https://online-go.com/api/v1/games/{game_id}/sgf"
+
+
+def fetch_game_sgf(game_id):
+    try:
+        with urllib.request.urlopen(game_sgf_url(game_id), timeout=10) as response:
+            return response.read().decode("utf-8", errors="replace")
+    except Exception:
+        return None
+
+
+def load_game_data(driver, game_id):
+    # Recording and replay drivers capture game data alongside browser calls.
+    loader = getattr(driver, "load_game_data", None)
+    if loader is not None:
+        return loader(game_id)
+    return fetch_game_data(game_id)
+
+
+def load_game_sgf(driver, game_id):
+    loader = getattr(driver, "load_game_sgf", None)
+    if loader is not None:
+        return loader(game_id)
+    return fetch_game_sgf(game_id)
+
+
 def parse_timestamp(value):
     if isinstance(value, (int, float)):
         return float(value)
@@ -393,7 +1051,7 @@ def tsumego_problem_complete(driver):
 def requires_login(driver, check_url, login_fragment):
     safe_get(driver, check_url)
     wait_for_dom_ready(driver)
-    time.sleep(1)
+    clock_sleep(1)
     return login_fragment in driver.current_url
 
 
@@ -405,7 +1063,7 @@ def wait_for_account_setup(driver, check_url, login_url, login_fragment, subtitl
         inject_overlay(driver, "Account Setup", subtitle)
         if login_fragment not in driver.current_url:
             return
-        time.sleep(3)
+        clock_sleep(3)
 
 
 def wait_for_ogs_login(driver):
@@ -419,7 +1077,196 @@ def wait_for_ogs_login(driver):
             "//input[@type='password']",
         ):
             return
-        time.sleep(3)
+        clock_sleep(3)
+
+
+# ================================
+# Game Cache
+# ================================
+
+def future_result(future, timeout):
+    try:
+        return future.result(timeout)
+    except Exception:
+        return None
+
+
+class SgfRequestHandler(BaseHTTPRequestHandler):
+    """Serves cached SGFs to KaTrain, which loads them cross-origin from the https page."""
+
+    def send_cors_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Private-Network", "true")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET")
+        self.end_headers()
+
+    def do_GET(self):
+        game_id = self.path.strip("/").split(".")[0]
+        sgf = self.server.games.sgf(game_id) if game_id.isdigit() else None
+        if sgf is None:
+            self.send_response(404)
+            self.send_cors_headers()
+            self.end_headers()
+            return
+        body = sgf.encode("utf-8")
+        self.send_response(200)
+        self.send_cors_headers()
+        self.send_header("Content-Type", "application/x-go-sgf; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GameCache:
+    """Fetches game data and SGFs in the background and serves the SGFs to KaTrain locally."""
+
+    def __init__(self, driver, workers=4, timeout=10):
+        self.driver = driver
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="game-prefetch")
+        self.data = {}
+        self.sgfs = {}
+        self.server = None
+
+    def refresh_data(self, game_id):
+        # Failed fetches, and data fetched while the game was still running,
+        # are fetched again; only a finished game's data is final.
+        data = self.data.get(game_id)
+        if data is None or (data.done() and not game_has_ended(future_result(data, 0))):
+            self.data[game_id] = self.executor.submit(load_game_data, self.driver, game_id)
+
+    def prefetch(self, game_id):
+        if game_id in self.sgfs:
+            return
+        self.refresh_data(game_id)
+        self.sgfs[game_id] = self.executor.submit(load_game_sgf, self.driver, game_id)
+
+    def game_data(self, game_id):
+        self.refresh_data(game_id)
+        return future_result(self.data[game_id], self.timeout)
+
+    def sgf(self, game_id):
+        future = self.sgfs.get(game_id)
+        return future_result(future, self.timeout) if future else None
+
+    def serve(self):
+        if self.server is None:
+            self.server = ThreadingHTTPServer(("127.0.0.1", 0), SgfRequestHandler)
+            self.server.games = self
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def review_url(self, game_id):
+        sgf_url = game_sgf_url(game_id)
+        if self.sgf(game_id):
+            sgf_url = f"{self.serve()}/{game_id}.sgf"
+        return f"{KATRAIN_BASE}?url={sgf_url}"
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def queue_for_review(games, review_queue, game_id):
+    if game_id not in review_queue:
+        review_queue.append(game_id)
+        games.prefetch(game_id)
+
+
+def games_to_review(review_queue, total_seconds):
+    # Only the most recent games that can each get the floor are reviewed.
+    return review_queue[-max(1, total_seconds // REVIEW_FLOOR_SECONDS):]
+
+
+def review_allotments(durations, total_seconds):
+    # Every game gets the floor, then the rest of the review time is split by
+    # game length, never past the game's own length. Games of unknown length
+    # get an average share.
+    known = [duration for duration in durations if duration]
+    fallback = sum(known) / len(known) if known else total_seconds / len(durations)
+    weights = [duration or fallback for duration in durations]
+    total_weight = sum(weights)
+    extra = max(0, total_seconds - REVIEW_FLOOR_SECONDS * len(weights))
+    return [
+        REVIEW_FLOOR_SECONDS + int(min(max(0, weight - REVIEW_FLOOR_SECONDS), extra * weight / total_weight))
+        for weight in weights
+    ]
+
+
+# ================================
+# Adaptive Polling
+# ================================
+
+# Waits inside the page: the normal interval while the user is active, or up
+# to the slow interval while idle or hidden, waking early on any input.
+# The loop redraws the overlay right after waking, before the click that
+# follows a pointerup lands, so a wake on NEXT or EXIT records the press itself.
+POLL_WAIT_SCRIPT = """
+const [intervalMs, idleAfterMs, idleMs, hiddenMs, done] = arguments;
+const activityEvents = ['mousemove', 'pointerdown', 'keydown', 'wheel', 'touchstart', 'click', 'visibilitychange'];
+const wakeEvents = ['pointerup', 'click', 'keyup', 'wheel', 'visibilitychange'];
+
+if (!window.goActivityTracked) {
+    window.goActivityTracked = true;
+    window.goLastInput = Date.now();
+    const mark = () => { window.goLastInput = Date.now(); };
+    activityEvents.forEach((name) => document.addEventListener(name, mark, {capture: true, passive: true}));
+}
+
+const idle = Date.now() - window.goLastInput >= idleAfterMs;
+if (!document.hidden && !idle) {
+    setTimeout(() => done('active'), intervalMs);
+    return;
+}
+
+let finished = false;
+const finish = (reason) => {
+    if (finished) return;
+    finished = true;
+    wakeEvents.forEach((name) => document.removeEventListener(name, wake, true));
+    done(reason);
+};
+const wake = (event) => {
+    const target = event.target;
+    if (target && target.closest) {
+        if (target.closest('#goBtn')) window.goNext = true;
+        if (target.closest('#exitBtn')) window.goExit = true;
+    }
+    finish('woke');
+};
+wakeEvents.forEach((name) => document.addEventListener(name, wake, true));
+setTimeout(() => finish(document.hidden ? 'hidden' : 'idle'), document.hidden ? hiddenMs : idleMs);
+"""
+
+
+def poll_wait(driver, interval):
+    start = clock_time()
+    try:
+        driver.execute_async_script(
+            POLL_WAIT_SCRIPT,
+            int(interval * 1000),
+            IDLE_AFTER_SECONDS * 1000,
+            max(interval, IDLE_POLL_SECONDS) * 1000,
+            max(interval, HIDDEN_POLL_SECONDS) * 1000,
+        )
+    except (WebDriverException, JavascriptException):
+        pass
+
+    # Never poll faster than the base interval, even if the page navigated
+    # away mid-wait or the user woke it straight away.
+    remaining = interval - (clock_time() - start)
+    if remaining > 0:
+        clock_sleep(remaining)
 
 
 # ================================
@@ -430,12 +1277,12 @@ def tsumego_block(driver):
 
     ensure_url(driver, TSUMEGO_URL)
 
-    end = time.time() + TSUMEGO_MIN * 60
+    end = clock_time() + TSUMEGO_MIN * 60
     time_up = False
 
     while True:
 
-        remaining = int(end - time.time())
+        remaining = int(end - clock_time())
 
         if remaining <= 0:
             time_up = True
@@ -447,7 +1294,7 @@ def tsumego_block(driver):
                     OVERLAY_COPY["tsumego_complete_title"],
                     OVERLAY_COPY["tsumego_complete_subtitle"],
                 )
-                time.sleep(2)
+                clock_sleep(2)
                 return
 
             inject_overlay(
@@ -467,36 +1314,39 @@ def tsumego_block(driver):
 
         ensure_url(driver, TSUMEGO_URL)
 
-        time.sleep(5)
+        poll_wait(driver, 5)
 
 
 # ================================
-# PLAY BLOCK (EARLY EXIT ENABLED)
+# PLAY BLOCK (AUTO-ADVANCE WHEN TIME IS UP)
 # ================================
 
-def play_block(driver, extra_practice=False):
+def play_block(driver, games, extra_practice=False):
 
     driver.get(OGS_URL)
 
-    end = time.time() + PLAY_MIN * 60
+    end = clock_time() + PLAY_MIN * 60
 
     current_game = None
     cached_game_data = None
     cached_outcome = None
+    review_queue = []
     phase = PLAY_PHASE_SEARCHING
 
     while True:
 
-        remaining = int(end - time.time())
+        remaining = int(end - clock_time())
 
         if phase in {PLAY_PHASE_OFFER_REVIEW, PLAY_PHASE_TIME_UP} and driver.execute_script(
             "return window.goNext === true;"
         ):
-            return current_game, cached_game_data
+            return review_queue
 
         gid = get_game_id(driver.current_url)
-        if gid:
+        if gid and gid != current_game:
             current_game = gid
+            cached_game_data = None
+            cached_outcome = None
 
         finished_game = game_finished(driver)
         in_game = "online-go.com/game/" in driver.current_url and not finished_game
@@ -506,39 +1356,45 @@ def play_block(driver, extra_practice=False):
             phase = PLAY_PHASE_SEARCHING
 
         if finished_game and current_game and not in_game:
-            if not cached_game_data:
-                cached_game_data = fetch_game_data(current_game)
+            queue_for_review(games, review_queue, current_game)
+            if not game_has_ended(cached_game_data):
+                cached_game_data = games.game_data(current_game)
                 cached_outcome = game_outcome_text(cached_game_data)
-            if reviewable_outcome(cached_outcome):
+            if reviewable_outcome(cached_outcome) and remaining <= 0:
                 inject_overlay(
                     driver,
                     OVERLAY_COPY["game_finished_auto_title"],
                     OVERLAY_COPY["game_finished_auto_subtitle"],
                 )
-                time.sleep(2)
-                return current_game, cached_game_data
+                clock_sleep(2)
+                return review_queue
             phase = PLAY_PHASE_OFFER_REVIEW
         elif current_game and not in_active_game(driver):
             if not cached_game_data:
-                cached_game_data = fetch_game_data(current_game)
+                cached_game_data = games.game_data(current_game)
                 cached_outcome = game_outcome_text(cached_game_data)
-            if game_has_ended(cached_game_data) and phase not in {PLAY_PHASE_OFFER_REVIEW, PLAY_PHASE_TIME_UP}:
-                phase = PLAY_PHASE_OFFER_REVIEW
+            if game_has_ended(cached_game_data):
+                queue_for_review(games, review_queue, current_game)
+                if phase not in {PLAY_PHASE_OFFER_REVIEW, PLAY_PHASE_TIME_UP}:
+                    phase = PLAY_PHASE_OFFER_REVIEW
 
-        # ⭐ EARLY EXIT WHEN GAME ENDS WITH RESIGN/PASS
+        # ⭐ AUTO-ADVANCE WHEN TIME IS UP AND THE GAME ENDS WITH RESIGN/PASS
+        # Before that, finished games are queued and the student may keep playing.
         if phase == PLAY_PHASE_IN_GAME and finished_game:
-            if current_game and not cached_game_data:
-                cached_game_data = fetch_game_data(current_game)
-                cached_outcome = game_outcome_text(cached_game_data)
+            if current_game:
+                queue_for_review(games, review_queue, current_game)
+                if not cached_game_data:
+                    cached_game_data = games.game_data(current_game)
+                    cached_outcome = game_outcome_text(cached_game_data)
 
-            if reviewable_outcome(cached_outcome) and not in_active_game(driver):
+            if reviewable_outcome(cached_outcome) and remaining <= 0 and not in_active_game(driver):
                 inject_overlay(
                     driver,
                     OVERLAY_COPY["game_finished_auto_title"],
                     OVERLAY_COPY["game_finished_auto_subtitle"],
                 )
-                time.sleep(2)
-                return current_game, cached_game_data
+                clock_sleep(2)
+                return review_queue
             phase = PLAY_PHASE_OFFER_REVIEW
 
         # timer expired — but never interrupt a game
@@ -577,71 +1433,105 @@ def play_block(driver, extra_practice=False):
 
         enforce_domain(driver, "online-go.com")
 
-        time.sleep(3)
+        poll_wait(driver, 3)
 
 
 # ================================
 # REVIEW BLOCK
 # ================================
 
-def review_block(driver, game_id, game_data=None):
+def review_block(driver, games, review_queue):
 
-    if not game_id:
+    if not review_queue:
         return False
 
-    sgf_url = f"https://online-go.com/api/v1/games/{game_id}/sgf"
-    katrain_url = f"{KATRAIN_BASE}?url={sgf_url}"
+    review_queue = games_to_review(review_queue, REVIEW_MIN * 60)
 
-    driver.get(katrain_url)
+    durations = [game_duration_seconds(games.game_data(game_id)) for game_id in review_queue]
+    allotments = review_allotments(durations, REVIEW_MIN * 60)
 
-    duration = game_duration_seconds(game_data)
-    review_seconds = REVIEW_MIN * 60
-    if duration is not None and duration < review_seconds:
-        review_seconds = max(60, int(duration))
+    for index, (game_id, review_seconds) in enumerate(zip(review_queue, allotments), start=1):
 
-    end = time.time() + review_seconds
+        driver.get(games.review_url(game_id))
 
-    while True:
+        more_games = index < len(review_queue)
+        title = OVERLAY_COPY["review_title"]
+        if len(review_queue) > 1:
+            title = f"{title} {index}/{len(review_queue)}"
 
-        remaining = int(end - time.time())
+        end = clock_time() + review_seconds
 
-        if remaining <= 0:
+        while True:
+
+            if more_games and driver.execute_script("return window.goNext === true;"):
+                break
+
+            remaining = int(end - clock_time())
+
+            if remaining <= 0:
+                if not more_games:
+                    break
+
+                inject_overlay(
+                    driver,
+                    OVERLAY_COPY["review_next_title"],
+                    OVERLAY_COPY["review_next_subtitle"],
+                    True,
+                )
+
+                while not driver.execute_script("return window.goNext === true;"):
+                    poll_wait(driver, 1)
+                break
+
+            mins = remaining // 60
+            secs = remaining % 60
 
             inject_overlay(
                 driver,
-                OVERLAY_COPY["review_complete_title"],
-                OVERLAY_COPY["review_complete_subtitle"],
-                True,
-                True,
+                title,
+                f"{mins}:{secs:02d}",
+                more_games,
+                countdown_seconds=remaining,
             )
 
-            while True:
-                if driver.execute_script("return window.goExit === true;"):
-                    return True
-                if driver.execute_script("return window.goNext === true;"):
-                    return False
-                time.sleep(1)
+            poll_wait(driver, 5)
 
-        mins = remaining // 60
-        secs = remaining % 60
+    inject_overlay(
+        driver,
+        OVERLAY_COPY["review_complete_title"],
+        OVERLAY_COPY["review_complete_subtitle"],
+        True,
+        True,
+    )
 
-        inject_overlay(
-            driver,
-            OVERLAY_COPY["review_title"],
-            f"{mins}:{secs:02d}",
-            countdown_seconds=remaining,
-        )
-
-        time.sleep(5)
+    while True:
+        if driver.execute_script("return window.goExit === true;"):
+            return True
+        if driver.execute_script("return window.goNext === true;"):
+            return False
+        poll_wait(driver, 1)
 
 
 # ================================
 # MAIN LOOP
 # ================================
 
-def run():
+def run(driver=None, trace_path=None, backend="auto"):
+
+    if driver is None:
+        driver = get_driver(backend)
+    if trace_path:
+        driver = RecordingDriver(driver, trace_path)
+
+    try:
+        training_loop(driver)
+    finally:
+        if trace_path:
+            driver.close_trace()
+
+
+def training_loop(driver):
 
-    driver = get_driver()
     extra_practice = False
 
     wait_for_account_setup(
@@ -654,17 +1544,52 @@ def run():
 
     wait_for_ogs_login(driver)
 
-    while True:
+    games = GameCache(driver)
+
+    try:
+        while True:
 
-        tsumego_block(driver)
+            tsumego_block(driver)
 
-        game_id, game_data = play_block(driver, extra_practice)
+            review_queue = play_block(driver, games, extra_practice)
 
-        should_exit = review_block(driver, game_id, game_data)
-        if should_exit:
-            break
-        extra_practice = True
+            should_exit = review_block(driver, games, review_queue)
+            if should_exit:
+                break
+            extra_practice = True
+    finally:
+        games.close()
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Go training session")
+    parser.add_argument("--record", metavar="TRACE", help="record every browser call to a trace file")
+    parser.add_argument(
+        "--replay",
+        metavar="TRACE",
+        help="replay a recorded trace offline and report call counts and CPU time",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BROWSER_BACKENDS,
+        default="auto",
+        help="browser backend; auto tries DevTools first and falls back to Selenium",
+    )
+    parser.add_argument(
+        "--benchmark",
+        metavar="CALLS",
+        type=int,
+        help="compare per-call latency and results of the DevTools and Selenium backends",
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        sys.exit(0 if benchmark_backends(args.benchmark) else 1)
+    elif args.replay:
+        sys.exit(0 if replay_matched(replay_session(args.replay)) else 1)
+    else:
+        run(trace_path=args.record, backend=args.backend)
+
+
 if __name__ == "__main__":
-    run()
+    main()
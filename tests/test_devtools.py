@@ -0,0 +1,280 @@
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Go_Training_Session as session  # noqa: E402
+
+
+def server_frame(opcode, payload, fin=True):
+    length = len(payload)
+    first = (0x80 if fin else 0) | opcode
+    if length < 126:
+        header = struct.pack("!BB", first, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", first, 126, length)
+    else:
+        header = struct.pack("!BBQ", first, 127, length)
+    return header + payload
+
+
+class FakeDevTools:
+    """Loopback DevTools endpoint: serves /json and answers WebSocket calls from handlers."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.calls = []
+        self.client_frames = []
+        self.connections = 0
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+
+    def close(self):
+        self.listener.close()
+
+    def accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    def serve(self, conn):
+        with conn:
+            reader = conn.makefile("rb")
+            request_line = reader.readline().decode("latin-1")
+            headers = {}
+            while True:
+                line = reader.readline().decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if request_line.startswith("GET /json"):
+                body = json.dumps([
+                    {"type": "service_worker", "webSocketDebuggerUrl": "ws://127.0.0.1:1/worker"},
+                    {"type": "page", "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/page/1"},
+                ]).encode("utf-8")
+                conn.sendall(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+                    + body
+                )
+                return
+
+            self.connections += 1
+            accept = base64.b64encode(
+                hashlib.sha1((headers["sec-websocket-key"] + session.WEBSOCKET_GUID).encode("ascii")).digest()
+            ).decode("ascii")
+            conn.sendall(
+                (
+                    "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+                ).encode("ascii")
+            )
+            while True:
+                frame = self.read_client_frame(reader)
+                if frame is None:
+                    return
+                opcode, payload = frame
+                self.client_frames.append((opcode, payload))
+                if opcode == 0x8:
+                    return
+                if opcode != 0x1:
+                    continue
+                request = json.loads(payload)
+                self.calls.append(request["method"])
+                self.handlers[request["method"]](conn, request["id"], request["params"])
+
+    def read_client_frame(self, reader):
+        header = reader.read(2)
+        if len(header) < 2:
+            return None
+        opcode = header[0] & 0x0F
+        if not header[1] & 0x80:
+            raise AssertionError("client frames must be masked")
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", reader.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", reader.read(8))[0]
+        mask = reader.read(4)
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(reader.read(length)))
+        return opcode, payload
+
+    def wait_for_frame(self, frame, timeout=2):
+        # The server reads client frames on its own thread, after the call has returned.
+        end = time.time() + timeout
+        while frame not in self.client_frames and time.time() < end:
+            time.sleep(0.01)
+        return frame in self.client_frames
+
+    @staticmethod
+    def reply(conn, message_id, result):
+        conn.sendall(server_frame(0x1, json.dumps({"id": message_id, "result": result}).encode("utf-8")))
+
+    @staticmethod
+    def value(conn, message_id, value):
+        FakeDevTools.reply(conn, message_id, {"result": {"type": "string", "value": value}})
+
+
+class MaskPayloadTest(unittest.TestCase):
+
+    def test_matches_bytewise_xor(self):
+        mask = b"\x01\x02\x03\x04"
+        for size in (0, 1, 3, 4, 5, 126, 70000):
+            payload = os.urandom(size)
+            expected = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+            self.assertEqual(session.mask_payload(mask, payload), expected)
+
+    def test_round_trip(self):
+        mask = os.urandom(4)
+        payload = b"hello devtools"
+        self.assertEqual(session.mask_payload(mask, session.mask_payload(mask, payload)), payload)
+
+
+class DevToolsDriverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeDevTools()
+        self.fake.handlers["Page.getNavigationHistory"] = lambda conn, message_id, params: self.fake.reply(
+            conn,
+            message_id,
+            {"currentIndex": 1, "entries": [{"url": "about:blank"}, {"url": "https://online-go.com/game/42"}]},
+        )
+        self.driver = session.DevToolsDriver(self.fake.port)
+
+    def tearDown(self):
+        self.driver.quit()
+        self.fake.close()
+
+    def test_connects_to_page_target(self):
+        self.assertEqual(self.fake.connections, 1)
+
+    def test_current_url_reads_navigation_history(self):
+        self.assertEqual(self.driver.current_url, "https://online-go.com/game/42")
+        self.assertNotIn("Runtime.evaluate", self.fake.calls)
+
+    def test_extended_length_frames_both_ways(self):
+        def echo(conn, message_id, params):
+            self.fake.value(conn, message_id, params["expression"])
+
+        self.fake.handlers["Runtime.evaluate"] = echo
+        for size in (200, 70000):
+            argument = "x" * size
+            result = self.driver.execute_script("return arguments[0];", argument)
+            self.assertIn(argument, result)
+
+    def test_fragmented_message(self):
+        def fragmented(conn, message_id, params):
+            body = json.dumps({"id": message_id, "result": {"result": {"value": "complete"}}}).encode("utf-8")
+            conn.sendall(server_frame(0x1, body[:10], fin=False))
+            conn.sendall(server_frame(0x0, body[10:20], fin=False))
+            conn.sendall(server_frame(0x0, body[20:]))
+
+        self.fake.handlers["Runtime.evaluate"] = fragmented
+        self.assertEqual(self.driver.execute_script("return document.readyState"), "complete")
+
+    def test_ping_answered_and_events_skipped(self):
+        def noisy(conn, message_id, params):
+            conn.sendall(server_frame(0x9, b"ping"))
+            conn.sendall(server_frame(0x1, json.dumps({"method": "Page.frameNavigated", "params": {}}).encode()))
+            conn.sendall(server_frame(0x1, json.dumps({"id": message_id - 1, "result": {}}).encode()))
+            self.fake.value(conn, message_id, "complete")
+
+        self.fake.handlers["Runtime.evaluate"] = noisy
+        self.assertEqual(self.driver.execute_script("return document.readyState"), "complete")
+        self.assertTrue(self.fake.wait_for_frame((0xA, b"ping")))
+
+    def test_reconnects_after_timeout(self):
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: None
+        with self.assertRaises(session.WebDriverException):
+            self.driver.evaluate("1", timeout=0.2)
+        self.assertIsNone(self.driver.connection)
+
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: self.fake.value(
+            conn, message_id, "ok"
+        )
+        self.assertEqual(self.driver.execute_script("return 'ok';"), "ok")
+        self.assertEqual(self.fake.connections, 2)
+
+    def test_connect_errors_are_driver_errors(self):
+        self.driver.quit()
+        self.fake.close()
+        with self.assertRaises(session.WebDriverException):
+            self.driver.current_url
+        self.assertIsNone(self.driver.connection)
+
+    def test_retries_while_context_is_lost(self):
+        attempts = []
+
+        def navigating(conn, message_id, params):
+            attempts.append(message_id)
+            if len(attempts) < 3:
+                error = {"id": message_id, "error": {"code": -32000, "message": "Cannot find default execution context"}}
+                conn.sendall(server_frame(0x1, json.dumps(error).encode("utf-8")))
+            else:
+                self.fake.value(conn, message_id, "complete")
+
+        self.fake.handlers["Runtime.evaluate"] = navigating
+        self.assertEqual(self.driver.execute_script("return document.readyState"), "complete")
+        self.assertEqual(len(attempts), 3)
+
+    def test_get_times_out_while_loading(self):
+        self.fake.handlers["Page.navigate"] = lambda conn, message_id, params: self.fake.reply(
+            conn, message_id, {"frameId": "1"}
+        )
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: self.fake.value(
+            conn, message_id, "loading"
+        )
+        with self.assertRaises(session.TimeoutException):
+            self.driver.get("https://online-go.com/", timeout=0.3)
+
+    def test_javascript_errors(self):
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: self.fake.reply(
+            conn,
+            message_id,
+            {"result": {}, "exceptionDetails": {"text": "Uncaught", "exception": {"description": "Error: boom"}}},
+        )
+        with self.assertRaises(session.JavascriptException):
+            self.driver.execute_script("throw new Error('boom')")
+
+    def test_async_script_timeout(self):
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: self.fake.reply(
+            conn,
+            message_id,
+            {"result": {}, "exceptionDetails": {"text": "Uncaught", "exception": {"description": "Error: script timeout"}}},
+        )
+        with self.assertRaises(session.TimeoutException):
+            self.driver.execute_async_script("/* never calls back */")
+
+    def test_async_script_clears_its_timer(self):
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: self.fake.value(
+            conn, message_id, params["expression"]
+        )
+        expression = self.driver.execute_async_script("arguments[0]('done');")
+        self.assertIn(".finally(() => clearTimeout(timer))", expression)
+
+    def test_find_element(self):
+        self.fake.handlers["Runtime.evaluate"] = lambda conn, message_id, params: self.fake.reply(
+            conn, message_id, {"result": {"type": "boolean", "value": "Analyze" not in params["expression"]}}
+        )
+        self.assertTrue(session.element_exists(self.driver, session.By.XPATH, "//*[contains(., 'Next')]"))
+        self.assertFalse(session.element_exists(self.driver, session.By.XPATH, "//button[contains(., 'Analyze')]"))
+
+
+if __name__ == "__main__":
+    unittest.main()
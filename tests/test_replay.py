@@ -0,0 +1,243 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Go_Training_Session as session  # noqa: E402
+
+GAME_URL = "https://online-go.com/game/7"
+RUNNING_GAME = {"start_time": 0}
+ENDED_GAME = {"start_time": 0, "end_time": 300, "outcome": "Resignation"}
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ScriptedBrowser:
+    """Fake tab on a virtual clock.
+
+    A game starts 10 s into the play block and ends by resignation at 40 s;
+    EXIT is clicked 10 s after the review finishes.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.url = session.TSUMEGO_URL
+        self.play_started = None
+        self.review_started = None
+
+    def play_elapsed(self):
+        return self.clock.now - self.play_started
+
+    @property
+    def current_url(self):
+        if self.play_started is not None and "online-go.com" in self.url:
+            self.url = GAME_URL if self.play_elapsed() >= 10 else session.OGS_URL
+        return self.url
+
+    def get(self, url):
+        if "sign-in" in url:
+            self.url = session.OGS_URL
+            return
+        if url == session.OGS_URL:
+            self.play_started = self.clock.now
+        if url.startswith(session.KATRAIN_BASE):
+            self.review_started = self.clock.now
+        self.url = url
+
+    def find_element(self, by, value):
+        if "Analyze" in value and self.url == GAME_URL and self.play_elapsed() >= 40:
+            return True
+        if "下一题" in value:
+            return True
+        raise session.NoSuchElementException(value)
+
+    def execute_script(self, script, *args):
+        if "readyState" in script:
+            return "complete"
+        if "document.body" in script:
+            return True
+        if "goExit" in script:
+            return self.review_started is not None and self.clock.now - self.review_started >= 70
+        return False if "goNext" in script else None
+
+    def execute_async_script(self, script, interval_ms, *args):
+        self.clock.now += interval_ms / 1000
+        return "active"
+
+    def load_game_data(self, game_id):
+        return ENDED_GAME if self.play_elapsed() >= 40 else RUNNING_GAME
+
+    def load_game_sgf(self, game_id):
+        return "(;GM[1])"
+
+
+def collapse(titles):
+    return [title for index, title in enumerate(titles) if index == 0 or titles[index - 1] != title]
+
+
+class SessionReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in (("TSUMEGO_MIN", 0.1), ("PLAY_MIN", 1), ("REVIEW_MIN", 1)):
+            patcher = mock.patch.object(session, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.titles = []
+        patcher = mock.patch.object(session, "inject_overlay", self.record_overlay)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.trace_path = os.path.join(directory.name, "session.jsonl")
+
+        clock = FakeClock()
+        session.LAST_NAVIGATION.update(url=None, time=0.0)
+        with mock.patch.dict(session.CLOCK, time=clock.time, sleep=clock.sleep):
+            session.run(ScriptedBrowser(clock), trace_path=self.trace_path)
+        self.recorded_titles = collapse(self.titles)
+
+    def record_overlay(self, driver, title, *args, **kwargs):
+        self.titles.append(title)
+        return True
+
+    def replay(self, poll_factor=1):
+        self.titles = []
+        poll_wait = session.poll_wait
+        with mock.patch.object(
+            session,
+            "poll_wait",
+            lambda driver, interval: poll_wait(driver, interval * poll_factor),
+        ), contextlib.redirect_stdout(io.StringIO()):
+            driver = session.replay_session(self.trace_path)
+        return driver, collapse(self.titles)
+
+    def test_recording_covers_every_phase(self):
+        copy = session.OVERLAY_COPY
+        self.assertEqual(
+            self.recorded_titles,
+            [
+                "Account Setup",
+                copy["tsumego_focus_title"],
+                copy["tsumego_complete_title"],
+                copy["play_title"],
+                copy["game_finished_title"],
+                copy["game_finished_auto_title"],
+                copy["review_title"],
+                copy["review_complete_title"],
+            ],
+        )
+
+    def test_replay_matches_recording(self):
+        driver, titles = self.replay()
+        self.assertEqual(titles, self.recorded_titles)
+        self.assertTrue(session.replay_matched(driver))
+        # The review page URL carries the local SGF server's port, which differs per run.
+        self.assertEqual(dict(driver.unmatched), {"get": 1})
+        for op in ("current_url", "find_element", "execute_async_script"):
+            self.assertEqual(driver.calls[op], driver.recorded_calls[op], op)
+
+    def test_faster_polling_sees_same_phases(self):
+        driver, titles = self.replay(poll_factor=1 / 3)
+        self.assertEqual(titles, self.recorded_titles)
+        self.assertTrue(session.replay_matched(driver))
+        self.assertGreater(driver.calls["current_url"], driver.recorded_calls["current_url"])
+        # Waits at intervals never recorded only count against side-effect calls.
+        self.assertGreater(driver.unmatched["execute_async_script"], 0)
+        self.assertLessEqual(set(driver.unmatched), session.REPLAY_OPTIONAL_OPS)
+
+    def test_slower_polling_sees_same_phases(self):
+        driver, titles = self.replay(poll_factor=3)
+        self.assertEqual(titles, self.recorded_titles)
+        self.assertTrue(session.replay_matched(driver))
+        self.assertLess(driver.calls["current_url"], driver.recorded_calls["current_url"])
+        self.assertLessEqual(set(driver.unmatched), session.REPLAY_OPTIONAL_OPS)
+
+    def test_replay_exit_code(self):
+        with mock.patch.object(sys, "argv", ["Go_Training_Session.py", "--replay", self.trace_path]):
+            with self.assertRaises(SystemExit) as exit_info, contextlib.redirect_stdout(io.StringIO()):
+                session.main()
+        self.assertEqual(exit_info.exception.code, 0)
+
+        # A version asking for a locator that was never recorded fails the replay.
+        with open(self.trace_path, encoding="utf-8") as trace:
+            lines = [line for line in trace if "find_element" not in line]
+        with open(self.trace_path, "w", encoding="utf-8") as trace:
+            trace.writelines(lines)
+        with mock.patch.object(sys, "argv", ["Go_Training_Session.py", "--replay", self.trace_path]):
+            with self.assertRaises(SystemExit) as exit_info, contextlib.redirect_stdout(io.StringIO()):
+                session.main()
+        self.assertEqual(exit_info.exception.code, 1)
+
+
+class ReplayCursorTest(unittest.TestCase):
+
+    def make_driver(self, events):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "trace.jsonl")
+        with open(path, "w", encoding="utf-8") as trace:
+            trace.write(json.dumps({"version": session.TRACE_VERSION}) + "\n")
+            for t, result in events:
+                trace.write(json.dumps({"t": t, "op": "current_url", "key": "", "result": result, "ms": 0}) + "\n")
+        return session.ReplayDriver(path)
+
+    def test_latest_event_at_or_before_now(self):
+        driver = self.make_driver([(0.0, "a"), (5.0, "b"), (10.0, "c")])
+        driver.now = 7.0
+        self.assertEqual(driver.current_url, "b")
+        self.assertEqual(driver.current_url, "b")
+        driver.now = 10.0
+        self.assertEqual(driver.current_url, "c")
+
+    def test_before_first_event_uses_first(self):
+        driver = self.make_driver([(2.0, "a"), (5.0, "b")])
+        self.assertEqual(driver.current_url, "a")
+
+    def test_same_instant_events_replay_in_order(self):
+        driver = self.make_driver([(1.0, "before"), (1.0, "after"), (4.0, "later")])
+        driver.now = 1.0
+        self.assertEqual(driver.current_url, "before")
+        self.assertEqual(driver.current_url, "after")
+        self.assertEqual(driver.current_url, "after")
+
+    def test_skips_ahead_when_polling_slower(self):
+        driver = self.make_driver([(1.0, "a"), (1.0, "b"), (6.0, "c"), (6.0, "d")])
+        driver.now = 6.5
+        self.assertEqual(driver.current_url, "c")
+        self.assertEqual(driver.current_url, "d")
+
+    def test_unmatched_calls_are_counted(self):
+        driver = self.make_driver([(0.0, "a")])
+        with self.assertRaises(session.NoSuchElementException):
+            driver.find_element(session.By.XPATH, "//missing")
+        self.assertIsNone(driver.execute_script("return 1"))
+        self.assertEqual(driver.unmatched["find_element"], 1)
+        self.assertEqual(driver.unmatched["execute_script"], 1)
+        self.assertFalse(session.replay_matched(driver))
+
+    def test_exhausted_after_grace(self):
+        driver = self.make_driver([(0.0, "a"), (10.0, "b")])
+        driver.sleep(10 + session.REPLAY_GRACE_SECONDS)
+        with self.assertRaises(session.ReplayExhausted):
+            driver.sleep(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Go_Training_Session as session  # noqa: E402
+
+
+class FakeGameDriver:
+    """Answers game data downloads from a script of successive responses."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.fetches = 0
+
+    def load_game_data(self, game_id):
+        self.fetches += 1
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def load_game_sgf(self, game_id):
+        return "(;GM[1])"
+
+
+class GameCacheTest(unittest.TestCase):
+
+    def make_cache(self, responses):
+        driver = FakeGameDriver(responses)
+        games = session.GameCache(driver)
+        self.addCleanup(games.close)
+        return driver, games
+
+    def test_refetches_until_the_game_has_ended(self):
+        running = {"start_time": 0}
+        ended = {"start_time": 0, "end_time": 300, "outcome": "Resignation"}
+        driver, games = self.make_cache([running, ended])
+
+        self.assertFalse(session.game_has_ended(games.game_data("7")))
+        self.assertTrue(session.game_has_ended(games.game_data("7")))
+        self.assertTrue(session.game_has_ended(games.game_data("7")))
+        self.assertEqual(driver.fetches, 2)
+
+    def test_retries_failed_fetches(self):
+        ended = {"end_time": 300, "outcome": "Resignation"}
+        driver, games = self.make_cache([None, ended])
+
+        self.assertIsNone(games.game_data("7"))
+        self.assertEqual(games.game_data("7"), ended)
+        self.assertEqual(driver.fetches, 2)
+
+    def test_prefetch_refreshes_unfinished_data(self):
+        running = {"start_time": 0}
+        ended = {"start_time": 0, "end_time": 300, "outcome": "Resignation"}
+        driver, games = self.make_cache([running, ended])
+
+        games.game_data("7")
+        games.prefetch("7")
+        self.assertEqual(games.game_data("7"), ended)
+        self.assertEqual(games.sgf("7"), "(;GM[1])")
+
+    def test_close_stops_the_sgf_server(self):
+        driver, games = self.make_cache([{"end_time": 300}])
+        games.prefetch("7")
+        url = games.review_url("7")
+        self.assertIn("127.0.0.1", url)
+
+        games.close()
+        self.assertIsNone(games.server)
+        with self.assertRaises(RuntimeError):
+            games.executor.submit(print)
+
+
+class ReviewAllotmentsTest(unittest.TestCase):
+
+    def test_single_game_matches_its_length(self):
+        self.assertEqual(session.review_allotments([300], 600), [300])
+        self.assertEqual(session.review_allotments([None], 600), [600])
+
+    def test_total_stays_within_budget(self):
+        for durations in ([600, 200], [100, None, 2000], [5000, 5000, 5000], [None, None]):
+            with self.subTest(durations=durations):
+                self.assertLessEqual(sum(session.review_allotments(durations, 600)), 600)
+
+    def test_every_game_gets_the_floor(self):
+        allotments = session.review_allotments([10, 3000, 20, None], 600)
+        self.assertTrue(all(allotment >= session.REVIEW_FLOOR_SECONDS for allotment in allotments))
+
+    def test_unknown_length_gets_the_average_share(self):
+        allotments = session.review_allotments([200, None, 400], 900)
+        self.assertEqual(allotments[1], session.review_allotments([200, 300, 400], 900)[1])
+
+    def test_more_games_than_fit_at_the_floor(self):
+        review_queue = [str(game_id) for game_id in range(15)]
+        kept = session.games_to_review(review_queue, 600)
+        self.assertEqual(kept, review_queue[-10:])
+
+        allotments = session.review_allotments([120] * len(kept), 600)
+        self.assertEqual(allotments, [session.REVIEW_FLOOR_SECONDS] * 10)
+        self.assertEqual(sum(allotments), 600)
+
+    def test_keeps_at_least_one_game(self):
+        self.assertEqual(session.games_to_review(["1", "2"], 30), ["2"])
+
+
+if __name__ == "__main__":
+    unittest.main()